@@ -0,0 +1,61 @@
+#
+# Copyright (c) 2022 Airbyte, Inc., all rights reserved.
+#
+
+import argparse
+import os
+import tempfile
+from typing import Iterable, List, Optional
+
+import yaml
+from airbyte_cdk.sources.declarative.schema.json_schema import SIDECAR_SUFFIX, YAML_EXTENSIONS, YamlSafeLoader, dump_json_schema
+
+
+def compile_schemas(directory: str) -> List[str]:
+    """
+    Converts every YAML schema found under directory to a JSON sidecar next to it, so JsonSchema can load the schema
+    with the JSON parser at runtime instead of the much slower YAML parser.
+    :param directory: directory to walk for YAML schemas
+    :return: paths of the written sidecar files
+    :raises ValueError: if a schema holds values JSON can't represent, e.g. dates
+    """
+    written = []
+    for root, _, files in os.walk(directory):
+        for file_name in sorted(files):
+            if not file_name.endswith(YAML_EXTENSIONS):
+                continue
+            yaml_path = os.path.join(root, file_name)
+            with open(yaml_path, "r") as f:
+                schema = yaml.load(f, Loader=YamlSafeLoader)
+            sidecar_path = yaml_path + SIDECAR_SUFFIX
+            _write_atomically(sidecar_path, dump_json_schema(schema, yaml_path))
+            written.append(sidecar_path)
+    return written
+
+
+def _write_atomically(path: str, content: str):
+    """
+    Writes to a temporary file next to path, which replaces path once fully written.
+    A failed write can't leave a truncated sidecar that would be picked over its YAML schema.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def main(args: Optional[Iterable[str]] = None):
+    parser = argparse.ArgumentParser(description="Precompile YAML schemas to JSON sidecar files")
+    parser.add_argument("directories", nargs="+", help="directories containing YAML schemas")
+    parsed_args = parser.parse_args(args)
+    for directory in parsed_args.directories:
+        for sidecar_path in compile_schemas(directory):
+            print(f"Compiled {sidecar_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,20 +3,126 @@
 #
 
 import json
-from typing import Any, Mapping, Union
+import os
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, Union
 
+import yaml
 from airbyte_cdk.sources.declarative.interpolation.interpolated_string import InterpolatedString
 from airbyte_cdk.sources.declarative.schema.schema_loader import SchemaLoader
 
+try:
+    # orjson is an optional, much faster drop-in for json.loads
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+try:
+    # LibYAML based loader, much faster than the pure Python one when PyYAML is built with it
+    from yaml import CSafeLoader as YamlSafeLoader
+except ImportError:
+    from yaml import SafeLoader as YamlSafeLoader
+
+YAML_EXTENSIONS = (".yaml", ".yml")
+SIDECAR_SUFFIX = ".json"
+
+# Schema files keyed by their absolute path: the file's mtime at read time, its content and the function parsing the content
+_schema_cache: Dict[str, Tuple[float, bytes, Callable[[bytes], Mapping[str, Any]]]] = {}
+
+
+def _resolve_schema_path(path: str) -> str:
+    """
+    YAML schemas can be precompiled to a JSON sidecar (foo.yaml -> foo.yaml.json) at build time, see compile_schemas.
+    :param path: path of the YAML schema file
+    :return: the sidecar path if it exists and is at least as recent as the YAML file, the given path otherwise
+    """
+    sidecar_path = path + SIDECAR_SUFFIX
+    try:
+        if os.stat(sidecar_path).st_mtime >= os.stat(path).st_mtime:
+            return sidecar_path
+    except FileNotFoundError:
+        pass
+    return path
+
+
+def dump_json_schema(schema: Mapping[str, Any], path: str) -> str:
+    """
+    :param schema: schema loaded from the YAML file at path
+    :param path: path of the schema file, for the error message
+    :return: the schema serialized to JSON
+    :raises ValueError: if the schema holds values JSON can't represent, e.g. dates
+    """
+    try:
+        return json.dumps(schema)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Schema {path} can't be converted to JSON: {e}") from e
+
+
+def _parse_yaml(content: bytes) -> Mapping[str, Any]:
+    return yaml.load(content, Loader=YamlSafeLoader)
+
+
+def _read_json_schema(path: str) -> Tuple[bytes, Callable[[bytes], Mapping[str, Any]]]:
+    with open(path, "rb") as f:
+        return f.read(), json_loads
+
+
+def _read_yaml_schema(path: str) -> Tuple[bytes, Callable[[bytes], Mapping[str, Any]]]:
+    resolved_path = _resolve_schema_path(path)
+    if resolved_path != path:
+        return _read_json_schema(resolved_path)
+    with open(path, "rb") as f:
+        content = f.read()
+    try:
+        # the YAML is parsed once, later reads only pay for the JSON parser
+        return dump_json_schema(_parse_yaml(content), path).encode(), json_loads
+    except ValueError:
+        # values JSON can't represent are kept by parsing the YAML itself on every read
+        return content, _parse_yaml
+
+
+def _schema_reader(path: str) -> Callable[[str], Tuple[bytes, Callable[[bytes], Mapping[str, Any]]]]:
+    return _read_yaml_schema if path.endswith(YAML_EXTENSIONS) else _read_json_schema
+
+
+class _LiteralPath:
+    """
+    File path without any Jinja syntax, it evaluates to itself without building a Jinja environment and template
+    """
+
+    def __init__(self, string: str):
+        self._string = string
+
+    def eval(self, config, **kwargs) -> str:
+        return self._string
+
+
+def _is_template(string: str) -> bool:
+    return "{{" in string or "{%" in string or "{#" in string
+
 
 class JsonSchema(SchemaLoader):
     def __init__(self, file_path: Union[str, InterpolatedString], config, **kwargs):
-        if type(file_path) == str:
-            file_path = InterpolatedString(file_path)
+        if isinstance(file_path, str):
+            file_path = InterpolatedString(file_path) if _is_template(file_path) else _LiteralPath(file_path)
         self._file_path = file_path
         self._config = config
         self._kwargs = kwargs
+        # config and kwargs don't change, so the path is evaluated once and its reader is picked from its extension
+        self._json_schema_path: Optional[str] = None
+        self._read: Optional[Callable[[str], Tuple[bytes, Callable[[bytes], Mapping[str, Any]]]]] = None
 
     def get_json_schema(self) -> Mapping[str, Any]:
-        with open(self._file_path.eval(self._config, **self._kwargs), "r") as f:
-            return json.loads(f.read())
+        """
+        Reads the schema file once per process and parses the cached content on every call, so each caller gets its own schema.
+        The cached content is invalidated when the file's mtime changes so edits are still picked up.
+        """
+        if self._json_schema_path is None:
+            self._json_schema_path = os.path.abspath(self._file_path.eval(self._config, **self._kwargs))
+            self._read = _schema_reader(self._json_schema_path)
+        json_schema_path = self._json_schema_path
+        mtime = os.stat(json_schema_path).st_mtime
+        cached = _schema_cache.get(json_schema_path)
+        if cached is None or cached[0] != mtime:
+            content, parse = self._read(json_schema_path)
+            cached = _schema_cache[json_schema_path] = (mtime, content, parse)
+        return cached[2](cached[1])
@@ -15,7 +15,7 @@ README = (HERE / "README.md").read_text()
 
 setup(
     name="airbyte-cdk",
-    version="0.1.62",
+    version="0.1.63",
     description="A framework for writing Airbyte Connectors.",
     long_description=README,
     long_description_content_type="text/markdown",
@@ -57,6 +57,11 @@ setup(
         "jello~=1.5.2",
     ],
     python_requires=">=3.9",
+    entry_points={
+        "console_scripts": [
+            "compile-schemas=airbyte_cdk.sources.declarative.schema.compile_schemas:main",
+        ],
+    },
     extras_require={
         "dev": [
             "MyPy~=0.812",
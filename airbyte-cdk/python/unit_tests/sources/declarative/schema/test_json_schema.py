@@ -0,0 +1,126 @@
+#
+# Copyright (c) 2022 Airbyte, Inc., all rights reserved.
+#
+
+import datetime
+import json
+import os
+
+import pytest
+from airbyte_cdk.sources.declarative.interpolation.interpolated_string import InterpolatedString
+from airbyte_cdk.sources.declarative.schema.compile_schemas import compile_schemas
+from airbyte_cdk.sources.declarative.schema.json_schema import JsonSchema
+
+config = {"field": "value"}
+
+
+def test_get_json_schema(tmp_path):
+    schema_file = tmp_path / "stream.json"
+    schema_file.write_text(json.dumps({"type": "object"}))
+    schema_loader = JsonSchema(str(tmp_path / "{{ name }}.json"), config, name="stream")
+    assert schema_loader.get_json_schema() == {"type": "object"}
+
+
+@pytest.mark.parametrize(
+    "file_path, is_interpolated",
+    [
+        ("./schemas/stream.json", False),
+        ("./schemas/{{ options['name'] }}.json", True),
+        ("./schemas/{% if true %}stream{% endif %}.json", True),
+    ],
+)
+def test_literal_file_path_is_not_interpolated(file_path, is_interpolated):
+    schema_loader = JsonSchema(file_path, config, options={"name": "stream"})
+    assert isinstance(schema_loader._file_path, InterpolatedString) == is_interpolated
+    assert schema_loader._file_path.eval(config, options={"name": "stream"}) == "./schemas/stream.json"
+
+
+def test_get_json_schema_is_cached(tmp_path, mocker):
+    schema_file = tmp_path / "stream.json"
+    schema_file.write_text(json.dumps({"type": "object"}))
+    schema_loader = JsonSchema(str(schema_file), config)
+    first = schema_loader.get_json_schema()
+
+    read = mocker.patch("airbyte_cdk.sources.declarative.schema.json_schema._read_json_schema")
+    assert JsonSchema(str(schema_file), config).get_json_schema() == first
+    relative_path = os.path.relpath(schema_file)
+    assert JsonSchema(relative_path, config).get_json_schema() == first
+    read.assert_not_called()
+
+
+def test_cached_schema_is_not_shared_between_callers(tmp_path):
+    schema_file = tmp_path / "stream.json"
+    schema_file.write_text(json.dumps({"type": "object", "properties": {"id": {"type": "string"}}}))
+    first = JsonSchema(str(schema_file), config).get_json_schema()
+    first["properties"]["name"] = {"type": "string"}
+    first["type"] = "array"
+    assert JsonSchema(str(schema_file), config).get_json_schema() == {"type": "object", "properties": {"id": {"type": "string"}}}
+
+
+def test_file_path_is_evaluated_once(tmp_path, mocker):
+    schema_file = tmp_path / "stream.json"
+    schema_file.write_text(json.dumps({"type": "object"}))
+    schema_loader = JsonSchema(str(tmp_path / "{{ name }}.json"), config, name="stream")
+    file_path_eval = mocker.spy(schema_loader._file_path, "eval")
+    schema_loader.get_json_schema()
+    schema_loader.get_json_schema()
+    assert file_path_eval.call_count == 1
+
+
+def test_get_json_schema_reloads_modified_file(tmp_path):
+    schema_file = tmp_path / "stream.json"
+    schema_file.write_text(json.dumps({"type": "object"}))
+    schema_loader = JsonSchema(str(schema_file), config)
+    assert schema_loader.get_json_schema() == {"type": "object"}
+
+    schema_file.write_text(json.dumps({"type": "array"}))
+    mtime = os.stat(schema_file).st_mtime
+    os.utime(schema_file, (mtime + 10, mtime + 10))
+    assert schema_loader.get_json_schema() == {"type": "array"}
+
+
+def test_get_yaml_schema(tmp_path):
+    schema_file = tmp_path / "stream.yaml"
+    schema_file.write_text("type: object\nproperties:\n  id:\n    type: string\n")
+    schema_loader = JsonSchema(str(schema_file), config)
+    assert schema_loader.get_json_schema() == {"type": "object", "properties": {"id": {"type": "string"}}}
+
+
+def test_yaml_schema_is_parsed_once(tmp_path, mocker):
+    schema_file = tmp_path / "stream.yaml"
+    schema_file.write_text("type: object\n")
+    assert JsonSchema(str(schema_file), config).get_json_schema() == {"type": "object"}
+
+    yaml_load = mocker.patch("airbyte_cdk.sources.declarative.schema.json_schema.yaml.load")
+    assert JsonSchema(str(schema_file), config).get_json_schema() == {"type": "object"}
+    yaml_load.assert_not_called()
+
+
+def test_get_yaml_schema_from_compiled_sidecar(tmp_path, mocker):
+    schema_file = tmp_path / "stream.yaml"
+    schema_file.write_text("type: object\n")
+    assert compile_schemas(str(tmp_path)) == [str(schema_file) + ".json"]
+
+    yaml_load = mocker.patch("airbyte_cdk.sources.declarative.schema.json_schema.yaml.load")
+    assert JsonSchema(str(schema_file), config).get_json_schema() == {"type": "object"}
+    yaml_load.assert_not_called()
+
+
+def test_stale_sidecar_is_ignored(tmp_path):
+    schema_file = tmp_path / "stream.yaml"
+    schema_file.write_text("type: object\n")
+    sidecar_file = tmp_path / "stream.yaml.json"
+    sidecar_file.write_text(json.dumps({"type": "array"}))
+    mtime = os.stat(schema_file).st_mtime
+    os.utime(sidecar_file, (mtime - 10, mtime - 10))
+    assert JsonSchema(str(schema_file), config).get_json_schema() == {"type": "object"}
+
+
+def test_yaml_schema_with_non_json_values_is_not_compiled(tmp_path):
+    schema_file = tmp_path / "stream.yaml"
+    schema_file.write_text("type: object\ndefault: 2020-01-01\n")
+    with pytest.raises(ValueError, match="stream.yaml"):
+        compile_schemas(str(tmp_path))
+
+    assert os.listdir(tmp_path) == ["stream.yaml"]
+    assert JsonSchema(str(schema_file), config).get_json_schema() == {"type": "object", "default": datetime.date(2020, 1, 1)}
@@ -3,11 +3,13 @@
 #
 
 
-from typing import Any, List, Mapping, Tuple
+from collections import Counter
+from typing import Any, Iterator, List, Mapping, MutableMapping, Set, Tuple, Type
 
 import pendulum
 import stripe
 from airbyte_cdk import AirbyteLogger
+from airbyte_cdk.models import AirbyteMessage, ConfiguredAirbyteCatalog
 from airbyte_cdk.sources import AbstractSource
 from airbyte_cdk.sources.streams import Stream
 from airbyte_cdk.sources.streams.http.auth import TokenAuthenticator
@@ -31,9 +33,11 @@ from source_stripe.streams import (
     Products,
     PromotionCodes,
     Refunds,
+    StripeStream,
     SubscriptionItems,
     Subscriptions,
     Transfers,
+    parent_records_cache,
 )
 
 
@@ -50,7 +54,11 @@ class SourceStripe(AbstractSource):
         authenticator = TokenAuthenticator(config["client_secret"])
         start_date = pendulum.parse(config["start_date"]).int_timestamp
         args = {"authenticator": authenticator, "account_id": config["account_id"], "start_date": start_date}
-        incremental_args = {**args, "lookback_window_days": config.get("lookback_window_days")}
+        incremental_args = {
+            **args,
+            "lookback_window_days": config.get("lookback_window_days"),
+            "use_events_for_incremental": config.get("use_events_for_incremental", False),
+        }
         return [
             BalanceTransactions(**incremental_args),
             BankAccounts(**args),
@@ -75,3 +83,17 @@ class SourceStripe(AbstractSource):
             Subscriptions(**incremental_args),
             Transfers(**incremental_args),
         ]
+
+    def read(
+        self, logger: AirbyteLogger, config: Mapping[str, Any], catalog: ConfiguredAirbyteCatalog, state: MutableMapping[str, Any] = None
+    ) -> Iterator[AirbyteMessage]:
+        with parent_records_cache(self.shared_parents(config, catalog)):
+            yield from super().read(logger, config, catalog, state)
+
+    def shared_parents(self, config: Mapping[str, Any], catalog: ConfiguredAirbyteCatalog) -> Set[Type[StripeStream]]:
+        """
+        :return: parent streams of more than one of the sub streams selected in the catalog
+        """
+        selected_streams = {configured_stream.stream.name for configured_stream in catalog.streams}
+        parents = Counter(getattr(stream, "parent", None) for stream in self.streams(config) if stream.name in selected_streams)
+        return {parent for parent, count in parents.items() if parent and count > 1}
@@ -2,28 +2,53 @@
 # Copyright (c) 2022 Airbyte, Inc., all rights reserved.
 #
 
+import concurrent.futures
 import math
+import os
+import tempfile
+import weakref
 from abc import ABC, abstractmethod
-from itertools import chain
-from typing import Any, Iterable, Mapping, MutableMapping, Optional
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import partial
+from itertools import chain, islice
+from typing import Any, Callable, FrozenSet, Iterable, Iterator, List, Mapping, MutableMapping, Optional, Tuple, Type
 
+import orjson
 import pendulum
 import requests
 from airbyte_cdk.models import SyncMode
 from airbyte_cdk.sources.streams.http import HttpStream
+from requests.adapters import HTTPAdapter
+
+# decoded body of each response, shared by parse_response and next_page_token and dropped along with the response
+_decoded_responses: "weakref.WeakKeyDictionary[requests.Response, Mapping[str, Any]]" = weakref.WeakKeyDictionary()
 
 
 class StripeStream(HttpStream, ABC):
     url_base = "https://api.stripe.com/v1/"
     primary_key = "id"
+    # keep-alive connections kept open to Stripe, it should cover the concurrent requests of sub streams
+    connection_pool_size = 32
+    # number of parent records read ahead, so that requests for their child records can be sent concurrently
+    parent_batch_size: int = 20
+    max_concurrent_requests: int = 8
+    # paths of files holding the records of parent streams already read during the current sync, see parent_records_cache
+    _parent_records_cache: Optional[MutableMapping[Tuple[Type["StripeStream"], str, int], str]] = None
+    # parent streams read by more than one sub stream of the current sync, only those are worth spooling
+    _shared_parents: FrozenSet[Type["StripeStream"]] = frozenset()
 
     def __init__(self, start_date: int, account_id: str, **kwargs):
         super().__init__(**kwargs)
         self.account_id = account_id
         self.start_date = start_date
+        # headers are the same for every request of the stream, HttpStream copies them before adding auth headers
+        self._headers = {"Stripe-Account": account_id} if account_id else {}
+        # all requests go to the same host, so a single pool of reused connections avoids a TLS handshake per request
+        self._session.mount(self.url_base, HTTPAdapter(pool_connections=1, pool_maxsize=self.connection_pool_size))
 
     def next_page_token(self, response: requests.Response) -> Optional[Mapping[str, Any]]:
-        decoded_response = response.json()
+        decoded_response = self.decode_response(response)
         if bool(decoded_response.get("has_more", "False")) and decoded_response.get("data", []):
             last_object_id = decoded_response["data"][-1]["id"]
             return {"starting_after": last_object_id}
@@ -45,23 +70,182 @@ class StripeStream(HttpStream, ABC):
         return params
 
     def request_headers(self, **kwargs) -> Mapping[str, Any]:
-        if self.account_id:
-            return {"Stripe-Account": self.account_id}
+        return self._headers
 
-        return {}
+    @staticmethod
+    def decode_response(response: requests.Response) -> Mapping[str, Any]:
+        """
+        Decodes the response body once, it is shared by parse_response and next_page_token.
+        The response itself is left untouched, the decoded body is kept aside until the response is garbage collected.
+        """
+        decoded_response = _decoded_responses.get(response)
+        if decoded_response is None:
+            # Stripe always responds with UTF-8 JSON, so decode the raw bytes with orjson instead of response.json()
+            decoded_response = orjson.loads(response.content)
+            _decoded_responses[response] = decoded_response
+        return decoded_response
 
     def parse_response(self, response: requests.Response, **kwargs) -> Iterable[Mapping]:
-        response_json = response.json()
+        # the body must be read through decode_response, next_page_token reuses what it decoded for the same response
+        response_json = self.decode_response(response)
         yield from response_json.get("data", [])  # Stripe puts records in a container array "data"
 
+    def read_records(
+        self,
+        sync_mode: SyncMode,
+        cursor_field: List[str] = None,
+        stream_slice: Mapping[str, Any] = None,
+        stream_state: Mapping[str, Any] = None,
+    ) -> Iterable[Mapping[str, Any]]:
+        """
+        Same pagination as HttpStream.read_records, except that the next page is requested in the background
+        while the records of the current page are emitted. Its starting_after token is known as soon as the page is received.
+        """
+        stream_state = stream_state or {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            response = self._send_page_request(stream_state, stream_slice, next_page_token=None)
+            while response is not None:
+                next_page_token = self.next_page_token(response)
+                next_response = None
+                if next_page_token:
+                    next_response = executor.submit(self._send_page_request, stream_state, stream_slice, next_page_token)
+
+                # only the page's records are kept, so the response and its raw body are freed before the records are emitted
+                records = list(self.parse_response(response, stream_state=stream_state, stream_slice=stream_slice))
+                del response
+                yield from records
+                response = next_response.result() if next_response else None
+
+    def _send_page_request(
+        self, stream_state: Mapping[str, Any], stream_slice: Optional[Mapping[str, Any]], next_page_token: Optional[Mapping[str, Any]]
+    ) -> requests.Response:
+        # mirrors how HttpStream.read_records builds and sends a page request, keep both in sync when upgrading the CDK,
+        # test_page_requests_match_http_stream fails when they send different requests
+        request_headers = self.request_headers(stream_state=stream_state, stream_slice=stream_slice, next_page_token=next_page_token)
+        request = self._create_prepared_request(
+            path=self.path(stream_state=stream_state, stream_slice=stream_slice, next_page_token=next_page_token),
+            headers=dict(request_headers, **self.authenticator.get_auth_header()),
+            params=self.request_params(stream_state=stream_state, stream_slice=stream_slice, next_page_token=next_page_token),
+            json=self.request_body_json(stream_state=stream_state, stream_slice=stream_slice, next_page_token=next_page_token),
+            data=self.request_body_data(stream_state=stream_state, stream_slice=stream_slice, next_page_token=next_page_token),
+        )
+        request_kwargs = self.request_kwargs(stream_state=stream_state, stream_slice=stream_slice, next_page_token=next_page_token)
+        if self.use_cache:
+            # use context manager to handle and store cassette metadata
+            with self.cache_file as cass:
+                self.cassete = cass
+                # vcr tries to find records based on the request, if such records exist, return from cache file
+                # else make a request and save record in cache file
+                return self._send_request(request, request_kwargs)
+        return self._send_request(request, request_kwargs)
+
+    def read_parent_records(self, parent: Type["StripeStream"]) -> Iterable[Mapping[str, Any]]:
+        """
+        Reads all records of a parent stream. Within parent_records_cache, the records of a shared parent are spooled to a
+        temporary file while being read, so other sub streams of the same parent read them from disk instead of requesting them again.
+        """
+        cache = StripeStream._parent_records_cache if parent in StripeStream._shared_parents else None
+        cache_key = (parent, self.account_id, self.start_date)
+        if cache is not None and cache_key in cache:
+            with open(cache[cache_key], "rb") as f:
+                for line in f:
+                    yield orjson.loads(line)
+            return
+
+        parent_stream = parent(authenticator=self.authenticator, account_id=self.account_id, start_date=self.start_date)
+        parent_records = parent_stream.read_records(sync_mode=SyncMode.full_refresh)
+        if cache is None:
+            yield from parent_records
+            return
+
+        spool = tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False)
+        try:
+            with spool:
+                for record in parent_records:
+                    # records are written before they are yielded, as sub streams may update their items
+                    spool.write(orjson.dumps(record) + b"\n")
+                    yield record
+        except BaseException:
+            # the parent was not fully read, e.g. the sync failed or stopped early
+            os.remove(spool.name)
+            raise
+        cache[cache_key] = spool.name
+
+    def read_slices_concurrently(self, stream_slices: Iterable[Mapping[str, Any]], **kwargs) -> Iterable[Mapping[str, Any]]:
+        """
+        Reads the slices of a batch concurrently, records are emitted in the order of the slices.
+        :param stream_slices: slices to read, usually one per parent record
+        """
+        yield from self._read_in_batches(stream_slices, partial(self._read_slices, **kwargs))
+
+    def _read_in_batches(
+        self, items: Iterable[Any], read_batch: Callable[[List[Any], concurrent.futures.Executor], Iterable[Mapping[str, Any]]]
+    ) -> Iterable[Mapping[str, Any]]:
+        """
+        Splits items into batches of parent_batch_size, whose requests share a pool of max_concurrent_requests workers.
+        :param read_batch: emits the records of a batch, in order, from requests it submits to the executor
+        """
+        items = iter(items)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
+            while True:
+                batch = list(islice(items, self.parent_batch_size))
+                if not batch:
+                    break
+                yield from read_batch(batch, executor)
+
+    def _read_slices(
+        self, stream_slices: List[Mapping[str, Any]], executor: concurrent.futures.Executor, **kwargs
+    ) -> Iterable[Mapping[str, Any]]:
+        futures = [executor.submit(self._read_slice, stream_slice=stream_slice, **kwargs) for stream_slice in stream_slices]
+        for future in futures:
+            yield from future.result()
+
+    def _read_slice(self, stream_slice: Mapping[str, Any], **kwargs) -> List[Mapping[str, Any]]:
+        return list(super().read_records(stream_slice=stream_slice, **kwargs))
+
+
+@contextmanager
+def parent_records_cache(shared_parents: Iterable[Type[StripeStream]]) -> Iterator[None]:
+    """
+    Shares the records of parent streams between their sub streams for the duration of a sync,
+    e.g. Customers are read once for both BankAccounts and CustomerBalanceTransactions.
+    :param shared_parents: parent streams read by more than one sub stream, the records of other parents aren't kept
+    """
+    StripeStream._parent_records_cache = {}
+    StripeStream._shared_parents = frozenset(shared_parents)
+    try:
+        yield
+    finally:
+        for path in StripeStream._parent_records_cache.values():
+            os.remove(path)
+        StripeStream._parent_records_cache = None
+        StripeStream._shared_parents = frozenset()
+
 
 class IncrementalStripeStream(StripeStream, ABC):
-    # Stripe returns most recently created objects first, so we don't want to persist state until the entire stream has been read
+    # Stripe returns most recently created objects first, so we don't want to persist state until the entire slice has been read
     state_checkpoint_interval = math.inf
-
-    def __init__(self, lookback_window_days: int = 0, **kwargs):
+    # Incremental syncs are split into windows of this many days, read from the oldest one, so that state is persisted
+    # after each window instead of once at the end of the sync. Windows filter on 'created', so they fit any stream whose
+    # cursor is its creation time (InvoiceItems' 'date' is one). None disables slicing for the other streams, e.g. the
+    # checkout sessions ones, whose API can't filter on 'created' and whose cursor is 'expires_at'
+    slice_range_days: Optional[int] = 30
+    # Types of the events sent when objects of the stream are created or updated. When set and enabled in the config,
+    # incremental syncs read the objects updated since the last sync from the Events API instead of only the created ones
+    event_types: Optional[List[str]] = None
+    # Stripe only keeps events for 30 days, older states are synced from the list endpoint
+    events_retention_days: int = 29
+    # number of recently emitted object ids remembered to skip older events of the same objects
+    emitted_ids_cache_size: int = 100_000
+
+    def __init__(self, lookback_window_days: int = 0, use_events_for_incremental: bool = False, **kwargs):
         super().__init__(**kwargs)
         self.lookback_window_days = lookback_window_days
+        # the lookback window is constant for the stream, so it is applied with plain int math for every request
+        self._lookback_seconds = abs(lookback_window_days or 0) * 24 * 60 * 60
+        self._lookback_logged = False
+        self.use_events_for_incremental = use_events_for_incremental
+        self._latest_event_created = 0
 
     @property
     @abstractmethod
@@ -77,25 +261,99 @@ class IncrementalStripeStream(StripeStream, ABC):
         Return the latest state by comparing the cursor value in the latest record with the stream's most recent state object
         and returning an updated state object.
         """
-        return {self.cursor_field: max(latest_record.get(self.cursor_field), current_stream_state.get(self.cursor_field, 0))}
+        # records read from events may have been created long ago, the state moves up to the latest event read instead
+        return {
+            self.cursor_field: max(
+                latest_record.get(self.cursor_field), current_stream_state.get(self.cursor_field, 0), self._latest_event_created
+            )
+        }
 
-    def request_params(self, stream_state: Mapping[str, Any] = None, **kwargs):
+    def stream_slices(
+        self, *, sync_mode: SyncMode, cursor_field: List[str] = None, stream_state: Mapping[str, Any] = None
+    ) -> Iterable[Optional[Mapping[str, Any]]]:
+        start_timestamp = self.get_start_timestamp(stream_state)
+        if sync_mode != SyncMode.incremental or not start_timestamp:
+            yield None
+            return
+
+        now = pendulum.now().int_timestamp
+        if (
+            self.use_events_for_incremental
+            and self.event_types
+            and stream_state
+            and start_timestamp > now - self.events_retention_days * 24 * 60 * 60
+        ):
+            yield {"created[gte]": start_timestamp, "types[]": self.event_types}
+            return
+
+        if not self.slice_range_days:
+            yield None
+            return
+
+        slice_range = self.slice_range_days * 24 * 60 * 60
+        while start_timestamp + slice_range < now:
+            end_timestamp = start_timestamp + slice_range
+            yield {"created[gte]": start_timestamp, "created[lte]": end_timestamp}
+            start_timestamp = end_timestamp + 1
+        # the latest window is left open, so records created during the sync are not skipped
+        yield {"created[gte]": start_timestamp}
+
+    def request_params(self, stream_state: Mapping[str, Any] = None, stream_slice: Mapping[str, Any] = None, **kwargs):
         stream_state = stream_state or {}
-        params = super().request_params(stream_state=stream_state, **kwargs)
+        params = super().request_params(stream_state=stream_state, stream_slice=stream_slice, **kwargs)
 
         start_timestamp = self.get_start_timestamp(stream_state)
         if start_timestamp:
             params["created[gte]"] = start_timestamp
+        if stream_slice:
+            for key in ("created[gte]", "created[lte]", "types[]"):
+                if key in stream_slice:
+                    params[key] = stream_slice[key]
         return params
 
+    def read_records(
+        self,
+        sync_mode: SyncMode,
+        cursor_field: List[str] = None,
+        stream_slice: Mapping[str, Any] = None,
+        stream_state: Mapping[str, Any] = None,
+    ) -> Iterable[Mapping[str, Any]]:
+        # the Events stream itself is read with such slices, it has no event types of its own
+        if self.event_types and stream_slice and "types[]" in stream_slice:
+            yield from self.read_records_from_events(stream_slice)
+        else:
+            yield from super().read_records(sync_mode, cursor_field=cursor_field, stream_slice=stream_slice, stream_state=stream_state)
+
+    def read_records_from_events(self, stream_slice: Mapping[str, Any]) -> Iterable[Mapping[str, Any]]:
+        """
+        Yields the latest version of the objects created or updated since the start of the slice, using the objects
+        embedded in their events. An object updated several times is emitted once, unless its events are further apart
+        than emitted_ids_cache_size other objects.
+        """
+        events_stream = Events(authenticator=self.authenticator, account_id=self.account_id, start_date=self.start_date)
+        emitted_ids = OrderedDict()
+        for event in events_stream.read_records(sync_mode=SyncMode.full_refresh, stream_slice=stream_slice):
+            self._latest_event_created = max(self._latest_event_created, event["created"])
+            record = event["data"]["object"]
+            # events are listed newest first, so the first event of an object holds its latest version
+            if record["id"] in emitted_ids:
+                emitted_ids.move_to_end(record["id"])
+                continue
+            emitted_ids[record["id"]] = None
+            if len(emitted_ids) > self.emitted_ids_cache_size:
+                emitted_ids.popitem(last=False)
+            yield record
+
     def get_start_timestamp(self, stream_state) -> int:
         start_point = self.start_date
         if stream_state and self.cursor_field in stream_state:
             start_point = max(start_point, stream_state[self.cursor_field])
 
-        if start_point and self.lookback_window_days:
-            self.logger.info(f"Applying lookback window of {self.lookback_window_days} days to stream {self.name}")
-            start_point = int(pendulum.from_timestamp(start_point).subtract(days=abs(self.lookback_window_days)).timestamp())
+        if start_point and self._lookback_seconds:
+            if not self._lookback_logged:
+                self.logger.info(f"Applying lookback window of {self.lookback_window_days} days to stream {self.name}")
+                self._lookback_logged = True
+            start_point = int(start_point - self._lookback_seconds)
 
         return start_point
 
@@ -106,6 +364,7 @@ class Customers(IncrementalStripeStream):
     """
 
     cursor_field = "created"
+    event_types = ["customer.created", "customer.updated"]
 
     def path(self, **kwargs) -> str:
         return "customers"
@@ -129,6 +388,15 @@ class Charges(IncrementalStripeStream):
     """
 
     cursor_field = "created"
+    event_types = [
+        "charge.captured",
+        "charge.expired",
+        "charge.failed",
+        "charge.pending",
+        "charge.refunded",
+        "charge.succeeded",
+        "charge.updated",
+    ]
 
     def path(self, **kwargs) -> str:
         return "charges"
@@ -140,15 +408,15 @@ class CustomerBalanceTransactions(StripeStream):
     """
 
     name = "customer_balance_transactions"
+    parent = Customers
 
     def path(self, stream_slice: Mapping[str, Any] = None, **kwargs):
         customer_id = stream_slice["customer_id"]
         return f"customers/{customer_id}/balance_transactions"
 
     def read_records(self, stream_slice: Optional[Mapping[str, Any]] = None, **kwargs) -> Iterable[Mapping[str, Any]]:
-        customers_stream = Customers(authenticator=self.authenticator, account_id=self.account_id, start_date=self.start_date)
-        for customer in customers_stream.read_records(sync_mode=SyncMode.full_refresh):
-            yield from super().read_records(stream_slice={"customer_id": customer["id"]}, **kwargs)
+        customers = self.read_parent_records(self.parent)
+        yield from self.read_slices_concurrently(({"customer_id": customer["id"]} for customer in customers), **kwargs)
 
 
 class Coupons(IncrementalStripeStream):
@@ -168,6 +436,13 @@ class Disputes(IncrementalStripeStream):
     """
 
     cursor_field = "created"
+    event_types = [
+        "charge.dispute.closed",
+        "charge.dispute.created",
+        "charge.dispute.funds_reinstated",
+        "charge.dispute.funds_withdrawn",
+        "charge.dispute.updated",
+    ]
 
     def path(self, **kwargs):
         return "disputes"
@@ -262,29 +537,46 @@ class StripeSubStream(StripeStream, ABC):
 
     def read_records(self, sync_mode: SyncMode, stream_slice: Optional[Mapping[str, Any]] = None, **kwargs) -> Iterable[Mapping[str, Any]]:
 
-        parent_stream = self.parent(authenticator=self.authenticator, account_id=self.account_id, start_date=self.start_date)
-        for record in parent_stream.read_records(sync_mode=SyncMode.full_refresh):
+        parent_records = self.read_parent_records(self.parent)
+
+        # next pages of sub items are requested concurrently for a batch of parent records, the order of records is preserved
+        yield from self._read_in_batches(parent_records, partial(self._read_sub_items, **kwargs))
+
+    def _read_sub_items(
+        self, parent_records: List[Mapping[str, Any]], executor: concurrent.futures.Executor, **kwargs
+    ) -> Iterable[Mapping[str, Any]]:
+        # stream attributes are bound to locals, as they are read for every parent record and item
+        sub_items_attr, parent_id, add_parent_id = self.sub_items_attr, self.parent_id, self.add_parent_id
+        # non-generic filter, mainly for BankAccounts stream only
+        filter_attr, filter_value = (self.filter["attr"], self.filter["value"]) if self.filter else (None, None)
+
+        sub_items = []
+        for record in parent_records:
 
-            items_obj = record.get(self.sub_items_attr, {})
+            items_obj = record.get(sub_items_attr, {})
             if not items_obj:
                 continue
 
             items = items_obj.get("data", [])
 
-            # non-generic filter, mainly for BankAccounts stream only
-            if self.filter:
-                items = [i for i in items if i.get(self.filter["attr"]) == self.filter["value"]]
+            # the filtered items are kept as a list, the last one is the cursor of the next pages
+            if filter_attr:
+                items = [i for i in items if i.get(filter_attr) == filter_value]
 
             # get next pages
-            items_next_pages = []
+            items_next_pages = None
             if items_obj.get("has_more") and items:
-                stream_slice = {self.parent_id: record["id"], "starting_after": items[-1]["id"]}
-                items_next_pages = super().read_records(sync_mode=SyncMode.full_refresh, stream_slice=stream_slice, **kwargs)
+                stream_slice = {parent_id: record["id"], "starting_after": items[-1]["id"]}
+                items_next_pages = executor.submit(self._read_slice, stream_slice=stream_slice, sync_mode=SyncMode.full_refresh, **kwargs)
 
-            for item in chain(items, items_next_pages):
-                if self.add_parent_id:
-                    # add reference to parent object when item doesn't have it already
-                    item[self.parent_id] = record["id"]
+            sub_items.append((record, items, items_next_pages))
+
+        for record, items, items_next_pages in sub_items:
+            for item in chain(items, items_next_pages.result() if items_next_pages else []):
+                if add_parent_id:
+                    # add reference to parent object when item doesn't have it already,
+                    # the item is copied so the parent record, which holds the first page of items, is left untouched
+                    item = {**item, parent_id: record["id"]}
                 yield item
 
 
@@ -294,6 +586,18 @@ class Invoices(IncrementalStripeStream):
     """
 
     cursor_field = "created"
+    event_types = [
+        "invoice.created",
+        "invoice.finalized",
+        "invoice.marked_uncollectible",
+        "invoice.paid",
+        "invoice.payment_action_required",
+        "invoice.payment_failed",
+        "invoice.payment_succeeded",
+        "invoice.sent",
+        "invoice.updated",
+        "invoice.voided",
+    ]
 
     def path(self, **kwargs):
         return "invoices"
@@ -366,6 +670,14 @@ class Subscriptions(IncrementalStripeStream):
     """
 
     cursor_field = "created"
+    event_types = [
+        "customer.subscription.created",
+        "customer.subscription.deleted",
+        "customer.subscription.pending_update_applied",
+        "customer.subscription.pending_update_expired",
+        "customer.subscription.trial_will_end",
+        "customer.subscription.updated",
+    ]
     status = "all"
 
     def path(self, **kwargs):
@@ -426,6 +738,16 @@ class PaymentIntents(IncrementalStripeStream):
     """
 
     cursor_field = "created"
+    event_types = [
+        "payment_intent.amount_capturable_updated",
+        "payment_intent.canceled",
+        "payment_intent.created",
+        "payment_intent.partially_funded",
+        "payment_intent.payment_failed",
+        "payment_intent.processing",
+        "payment_intent.requires_action",
+        "payment_intent.succeeded",
+    ]
 
     def path(self, **kwargs):
         return "payment_intents"
@@ -460,14 +782,13 @@ class CheckoutSessions(IncrementalStripeStream):
     name = "checkout_sessions"
 
     cursor_field = "expires_at"
+    slice_range_days = None
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-
+    def __init__(self, lookback_window_days: int = 0, **kwargs):
         # https://stripe.com/docs/api/checkout/sessions/create#create_checkout_session-expires_at
         # 'expires_at' - can be anywhere from 1 to 24 hours after Checkout Session creation.
         # thus we should always add 1 day to lookback window to avoid possible checkout_sessions losses
-        self.lookback_window_days = self.lookback_window_days + 1
+        super().__init__(lookback_window_days=lookback_window_days + 1, **kwargs)
 
     def path(self, **kwargs):
         return "checkout/sessions"
@@ -495,14 +816,13 @@ class CheckoutSessionsLineItems(IncrementalStripeStream):
     name = "checkout_sessions_line_items"
 
     cursor_field = "checkout_session_expires_at"
+    slice_range_days = None
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-
+    def __init__(self, lookback_window_days: int = 0, **kwargs):
         # https://stripe.com/docs/api/checkout/sessions/create#create_checkout_session-expires_at
         # 'expires_at' - can be anywhere from 1 to 24 hours after Checkout Session creation.
         # thus we should always add 1 day to lookback window to avoid possible checkout_sessions losses
-        self.lookback_window_days = self.lookback_window_days + 1
+        super().__init__(lookback_window_days=lookback_window_days + 1, **kwargs)
 
     def path(self, stream_slice: Mapping[str, Any] = None, **kwargs):
         return f"checkout/sessions/{stream_slice['checkout_session_id']}/line_items"
@@ -516,12 +836,15 @@ class CheckoutSessionsLineItems(IncrementalStripeStream):
         if stream_state:
             checkout_session_state = {"expires_at": stream_state["checkout_session_expires_at"]}
 
-        for checkout_session in checkout_session_stream.read_records(sync_mode=SyncMode.full_refresh, stream_state=checkout_session_state):
-            stream_slice = {
+        checkout_sessions = checkout_session_stream.read_records(sync_mode=SyncMode.full_refresh, stream_state=checkout_session_state)
+        stream_slices = (
+            {
                 "checkout_session_id": checkout_session["id"],
                 "expires_at": checkout_session["expires_at"],
             }
-            yield from super().read_records(stream_slice=stream_slice, **kwargs)
+            for checkout_session in checkout_sessions
+        )
+        yield from self.read_slices_concurrently(stream_slices, **kwargs)
 
     def request_params(self, stream_slice: Mapping[str, Any] = None, **kwargs):
         params = super().request_params(stream_slice=stream_slice, **kwargs)
@@ -538,11 +861,11 @@ class CheckoutSessionsLineItems(IncrementalStripeStream):
 
     def parse_response(self, response: requests.Response, stream_slice: Mapping[str, Any] = None, **kwargs) -> Iterable[Mapping]:
         if response.status_code == 404:
-            self.logger.warning(response.json())
+            self.logger.warning(self.decode_response(response))
             return
         response.raise_for_status()
 
-        response_json = response.json()
+        response_json = self.decode_response(response)
         data = response_json.get("data", [])
         if data and stream_slice:
             print(f"stream_slice: {stream_slice}")
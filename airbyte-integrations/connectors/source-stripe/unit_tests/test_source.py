@@ -8,8 +8,9 @@ from unittest.mock import Mock, patch
 import pendulum
 import pytest
 import source_stripe
+from airbyte_cdk.models import AirbyteStream, ConfiguredAirbyteCatalog, ConfiguredAirbyteStream, DestinationSyncMode, SyncMode
 from source_stripe import SourceStripe
-from source_stripe.source import Invoices
+from source_stripe.source import Customers, Invoices
 
 now_dt = pendulum.now()
 
@@ -60,3 +61,24 @@ def test_source_check_connection_failure(mocked_client, config, logger_mock):
     exception = Exception("Test")
     mocked_client.Account.retrieve = Mock(side_effect=exception)
     assert SourceStripe().check_connection(logger_mock, config=config) == (False, exception)
+
+
+@pytest.mark.parametrize(
+    "stream_names, expected",
+    [
+        (["bank_accounts", "customer_balance_transactions", "invoice_line_items", "subscription_items"], {Customers}),
+        (["bank_accounts", "customers", "invoice_line_items", "invoices"], set()),
+    ],
+)
+def test_shared_parents(config, stream_names, expected):
+    catalog = ConfiguredAirbyteCatalog(
+        streams=[
+            ConfiguredAirbyteStream(
+                stream=AirbyteStream(name=name, json_schema={}, supported_sync_modes=[SyncMode.full_refresh]),
+                sync_mode=SyncMode.full_refresh,
+                destination_sync_mode=DestinationSyncMode.overwrite,
+            )
+            for name in stream_names
+        ]
+    )
+    assert SourceStripe().shared_parents(config, catalog) == expected
@@ -2,8 +2,19 @@
 # Copyright (c) 2022 Airbyte, Inc., all rights reserved.
 #
 
+import gc
+import threading
+import weakref
+from unittest.mock import MagicMock, patch
+
+import orjson
+import pendulum
 import pytest
+import requests
+import source_stripe
 from airbyte_cdk.models import SyncMode
+from airbyte_cdk.sources.streams.http import HttpStream
+from airbyte_cdk.sources.streams.http.auth import TokenAuthenticator
 from source_stripe.streams import (
     BalanceTransactions,
     BankAccounts,
@@ -24,11 +35,15 @@ from source_stripe.streams import (
     Products,
     PromotionCodes,
     Refunds,
+    StripeStream,
     SubscriptionItems,
     Subscriptions,
     Transfers,
+    parent_records_cache,
 )
 
+SECONDS_IN_DAY = 24 * 60 * 60
+
 
 def test_missed_id_child_stream(requests_mock):
 
@@ -135,6 +150,239 @@ def test_sub_stream(requests_mock):
     ]
 
 
+def test_sub_stream_next_pages_keep_parent_order(requests_mock):
+    invoices = [
+        {
+            "id": f"in_{i}",
+            "object": "invoice",
+            "lines": {"data": [{"id": f"il_{i}_1", "object": "line_item"}], "has_more": True, "object": "list"},
+        }
+        for i in range(3)
+    ]
+    requests_mock.get("https://api.stripe.com/v1/invoices", json={"has_more": False, "object": "list", "data": invoices})
+    for i in range(3):
+        requests_mock.get(
+            f"https://api.stripe.com/v1/invoices/in_{i}/lines",
+            json={"data": [{"id": f"il_{i}_2", "object": "line_item"}], "has_more": False, "object": "list"},
+        )
+
+    stream = InvoiceLineItems(start_date=1641008947, account_id="None")
+    stream.parent_batch_size = 2
+    records = stream.read_records(sync_mode=SyncMode.full_refresh)
+    assert [record["id"] for record in records] == ["il_0_1", "il_0_2", "il_1_1", "il_1_2", "il_2_1", "il_2_2"]
+
+
+def test_paginated_stream_decodes_each_page_once(requests_mock):
+    requests_mock.get(
+        "https://api.stripe.com/v1/customers",
+        [
+            {"json": {"data": [{"id": "cus_1", "created": 1641038947}], "has_more": True, "object": "list"}},
+            {"json": {"data": [{"id": "cus_2", "created": 1641038946}], "has_more": False, "object": "list"}},
+        ],
+    )
+    stream = Customers(start_date=1641008947, account_id=None)
+    with patch.object(source_stripe.streams.orjson, "loads", wraps=orjson.loads) as loads:
+        records = list(stream.read_records(sync_mode=SyncMode.full_refresh))
+    assert [record["id"] for record in records] == ["cus_1", "cus_2"]
+    assert loads.call_count == 2
+    assert requests_mock.request_history[1].qs["starting_after"] == ["cus_1"]
+
+
+def test_next_page_is_requested_before_current_page_is_emitted(requests_mock):
+    next_page_requested = threading.Event()
+
+    def next_page(request, context):
+        next_page_requested.set()
+        return {"data": [{"id": "cus_3", "created": 1641038945}], "has_more": False, "object": "list"}
+
+    requests_mock.get(
+        "https://api.stripe.com/v1/customers",
+        json={"data": [{"id": "cus_1", "created": 1641038947}, {"id": "cus_2", "created": 1641038946}], "has_more": True, "object": "list"},
+    )
+    requests_mock.get("https://api.stripe.com/v1/customers?starting_after=cus_2", json=next_page)
+    records = Customers(start_date=1641008947, account_id=None).read_records(sync_mode=SyncMode.full_refresh)
+
+    assert next(records)["id"] == "cus_1"
+    assert next_page_requested.wait(timeout=5)
+    assert [record["id"] for record in records] == ["cus_2", "cus_3"]
+
+
+def test_page_requests_match_http_stream():
+    pages = [
+        b'{"data": [{"id": "ch_1", "created": 1641038947}], "has_more": true, "object": "list"}',
+        b'{"data": [{"id": "ch_2", "created": 1641038946}], "has_more": false, "object": "list"}',
+    ]
+
+    def sent_requests(read_records):
+        stream = Charges(authenticator=TokenAuthenticator("sk_test"), start_date=1641008947, account_id="acct_1")
+        responses = []
+        for page in pages:
+            response = requests.Response()
+            response._content = page
+            responses.append(response)
+        with patch.object(stream, "_send_request", side_effect=responses) as send_request:
+            list(read_records(stream, sync_mode=SyncMode.incremental, stream_slice={"created[gte]": 1641008947}, stream_state={}))
+        return [
+            (request.method, request.url, dict(request.headers), request.body, request_kwargs)
+            for (request, request_kwargs), _ in send_request.call_args_list
+        ]
+
+    http_stream_requests = sent_requests(HttpStream.read_records)
+    assert len(http_stream_requests) == 2
+    assert sent_requests(StripeStream.read_records) == http_stream_requests
+
+
+def test_paginated_stream_requests_go_through_cache(requests_mock):
+    requests_mock.get(
+        "https://api.stripe.com/v1/customers",
+        [
+            {"json": {"data": [{"id": "cus_1", "created": 1641038947}], "has_more": True, "object": "list"}},
+            {"json": {"data": [{"id": "cus_2", "created": 1641038946}], "has_more": False, "object": "list"}},
+        ],
+    )
+    stream = Customers(start_date=1641008947, account_id=None)
+    stream.cache_file = MagicMock()
+    with patch.object(Customers, "use_cache", True):
+        records = list(stream.read_records(sync_mode=SyncMode.full_refresh))
+    assert [record["id"] for record in records] == ["cus_1", "cus_2"]
+    assert stream.cache_file.__enter__.call_count == 2
+
+
+def test_page_response_is_released_before_its_records_are_emitted(requests_mock):
+    requests_mock.get(
+        "https://api.stripe.com/v1/customers",
+        json={
+            "data": [{"id": "cus_1", "created": 1641038947}, {"id": "cus_2", "created": 1641038946}],
+            "has_more": False,
+            "object": "list",
+        },
+    )
+    stream = Customers(start_date=1641008947, account_id=None)
+    responses = []
+
+    def send_page_request(*args, **kwargs):
+        response = StripeStream._send_page_request(stream, *args, **kwargs)
+        responses.append(weakref.ref(response))
+        return response
+
+    with patch.object(stream, "_send_page_request", side_effect=send_page_request):
+        records = stream.read_records(sync_mode=SyncMode.full_refresh)
+        assert next(records)["id"] == "cus_1"
+        gc.collect()
+        assert responses[0]() is None
+        assert [record["id"] for record in records] == ["cus_2"]
+
+
+def test_decoded_response_keeps_its_body():
+    response = requests.Response()
+    response._content = b'{"data": [{"id": "cus_1"}], "has_more": false}'
+    stream = Customers(start_date=1641008947, account_id=None)
+    assert [record["id"] for record in stream.parse_response(response)] == ["cus_1"]
+    assert stream.next_page_token(response) is None
+    assert response.json() == {"data": [{"id": "cus_1"}], "has_more": False}
+
+
+def test_customer_balance_transactions_keep_customer_order(requests_mock):
+    customers = [{"id": f"cus_{i}", "created": 1641038947} for i in range(5)]
+    requests_mock.get("https://api.stripe.com/v1/customers", json={"data": customers, "has_more": False, "object": "list"})
+    for i in range(5):
+        requests_mock.get(
+            f"https://api.stripe.com/v1/customers/cus_{i}/balance_transactions",
+            json={"data": [{"id": f"cbtxn_{i}", "customer": f"cus_{i}"}], "has_more": False, "object": "list"},
+        )
+
+    stream = CustomerBalanceTransactions(start_date=1641008947, account_id=None)
+    stream.parent_batch_size = 2
+    records = stream.read_records(sync_mode=SyncMode.full_refresh)
+    assert [record["id"] for record in records] == [f"cbtxn_{i}" for i in range(5)]
+
+
+def test_parent_records_are_read_once_per_sync(requests_mock):
+    customers = [
+        {"id": "cus_1", "created": 1641038947, "sources": {"data": [{"id": "ba_1", "object": "bank_account"}], "has_more": False}},
+    ]
+    customers_mock = requests_mock.get("https://api.stripe.com/v1/customers", json={"data": customers, "has_more": False, "object": "list"})
+    requests_mock.get(
+        "https://api.stripe.com/v1/customers/cus_1/balance_transactions",
+        json={"data": [{"id": "cbtxn_1", "customer": "cus_1"}], "has_more": False, "object": "list"},
+    )
+
+    with parent_records_cache([Customers]):
+        bank_accounts = list(BankAccounts(start_date=1641008947, account_id=None).read_records(sync_mode=SyncMode.full_refresh))
+        transactions = list(
+            CustomerBalanceTransactions(start_date=1641008947, account_id=None).read_records(sync_mode=SyncMode.full_refresh)
+        )
+
+    assert bank_accounts == [{"id": "ba_1", "object": "bank_account"}]
+    assert transactions == [{"id": "cbtxn_1", "customer": "cus_1"}]
+    assert customers_mock.call_count == 1
+
+
+def test_unshared_parent_records_are_not_spooled(requests_mock):
+    invoices = [{"id": "in_1", "created": 1641038947, "lines": {"data": [{"id": "il_1"}], "has_more": False}}]
+    requests_mock.get("https://api.stripe.com/v1/invoices", json={"data": invoices, "has_more": False, "object": "list"})
+
+    with parent_records_cache([Customers]), patch.object(source_stripe.streams.tempfile, "NamedTemporaryFile") as named_temporary_file:
+        line_items = list(InvoiceLineItems(start_date=1641008947, account_id=None).read_records(sync_mode=SyncMode.full_refresh))
+
+    assert line_items == [{"id": "il_1", "invoice_id": "in_1"}]
+    named_temporary_file.assert_not_called()
+
+
+@pytest.mark.parametrize("account_id, expected", [("acct_1", {"Stripe-Account": "acct_1"}), (None, {})])
+def test_request_headers(account_id, expected):
+    stream = Customers(start_date=1641008947, account_id=account_id)
+    assert stream.request_headers(stream_state={}) == expected
+
+
+def test_incremental_stream_slices():
+    now = pendulum.now().int_timestamp
+    start_date = now - 65 * SECONDS_IN_DAY
+    stream = Charges(start_date=start_date, account_id=None)
+    slices = list(stream.stream_slices(sync_mode=SyncMode.incremental, stream_state={}))
+    assert slices == [
+        {"created[gte]": start_date, "created[lte]": start_date + 30 * SECONDS_IN_DAY},
+        {"created[gte]": start_date + 30 * SECONDS_IN_DAY + 1, "created[lte]": start_date + 60 * SECONDS_IN_DAY + 1},
+        {"created[gte]": start_date + 60 * SECONDS_IN_DAY + 2},
+    ]
+    assert stream.request_params(stream_state={}, stream_slice=slices[1]) == {"limit": 100, **slices[1]}
+    assert list(stream.stream_slices(sync_mode=SyncMode.full_refresh, stream_state={})) == [None]
+
+
+def test_incremental_stream_slices_start_from_state():
+    now = pendulum.now().int_timestamp
+    stream = Charges(start_date=now - 365 * SECONDS_IN_DAY, account_id=None)
+    slices = list(stream.stream_slices(sync_mode=SyncMode.incremental, stream_state={"created": now - SECONDS_IN_DAY}))
+    assert slices == [{"created[gte]": now - SECONDS_IN_DAY}]
+
+
+def test_incremental_stream_reads_updates_from_events(requests_mock):
+    now = pendulum.now().int_timestamp
+    events = [
+        {"id": "evt_3", "created": now - 10, "type": "charge.updated", "data": {"object": {"id": "ch_1", "created": 1, "amount": 3}}},
+        {"id": "evt_2", "created": now - 20, "type": "charge.succeeded", "data": {"object": {"id": "ch_2", "created": 2, "amount": 2}}},
+        {"id": "evt_1", "created": now - 30, "type": "charge.updated", "data": {"object": {"id": "ch_1", "created": 1, "amount": 1}}},
+    ]
+    events_mock = requests_mock.get("https://api.stripe.com/v1/events", json={"data": events, "has_more": False, "object": "list"})
+
+    stream = Charges(start_date=now - 365 * SECONDS_IN_DAY, account_id=None, use_events_for_incremental=True)
+    stream_state = {"created": now - SECONDS_IN_DAY}
+    slices = list(stream.stream_slices(sync_mode=SyncMode.incremental, stream_state=stream_state))
+    assert slices == [{"created[gte]": now - SECONDS_IN_DAY, "types[]": Charges.event_types}]
+
+    records = list(stream.read_records(sync_mode=SyncMode.incremental, stream_slice=slices[0], stream_state=stream_state))
+    assert records == [{"id": "ch_1", "created": 1, "amount": 3}, {"id": "ch_2", "created": 2, "amount": 2}]
+    assert events_mock.last_request.qs["types[]"] == Charges.event_types
+    assert stream.get_updated_state(stream_state, records[-1]) == {"created": now - 10}
+
+
+def test_incremental_stream_reads_old_state_from_list():
+    now = pendulum.now().int_timestamp
+    stream = Charges(start_date=now - 365 * SECONDS_IN_DAY, account_id=None, use_events_for_incremental=True)
+    slices = list(stream.stream_slices(sync_mode=SyncMode.incremental, stream_state={"created": now - 45 * SECONDS_IN_DAY}))
+    assert all("types[]" not in stream_slice for stream_slice in slices)
+
+
 @pytest.fixture(name="config")
 def config_fixture():
     config = {"authenticator": "authenticator", "account_id": "<account_id>", "start_date": 1652783086}